@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 from math import sqrt
-from collections import defaultdict
+from collections import Counter, defaultdict
 
 CACHE = defaultdict(int) # len(CACHE) == n to solution <= 201
+STATS = None  # Counter of CACHE hits and misses while enable_stats() is on
+STATS_CALLBACK = None
 
 def solution(n):
     '''
@@ -16,7 +18,10 @@ def solution(n):
     calls for identity case, i.e. "5 ⊂ p(5)" to be discarded from the answer:
     "stairs must have at least 2 steps"
     '''
-    return partition(n) - 1
+    s = partition(n) - 1
+    if STATS_CALLBACK is not None:
+        STATS_CALLBACK(dict(STATS))
+    return s
 
 def partition(n):
     '''
@@ -41,6 +46,37 @@ def partition(n):
     CACHE[n] = s * 2 + A_k(n)
     return CACHE[n]
 
+_partition = partition
+
+def counted_partition(n):
+    '''
+    Stands in for partition() while stats are enabled. partition() recurses
+    through the module-level name, so every lookup, recursive or not, is
+    counted as a CACHE hit or miss before being passed on.
+    '''
+    STATS['cache_hits' if CACHE[n] != 0 else 'cache_misses'] += 1
+    return _partition(n)
+
+def enable_stats(callback=None):
+    '''
+    cache_hits, cache_misses: CACHE lookups made by partition(), counted
+    by counted_partition() which stands in for it while enabled
+    '''
+    global STATS, STATS_CALLBACK, partition
+    STATS = Counter()
+    STATS_CALLBACK = callback
+    partition = counted_partition
+
+def disable_stats():
+    global STATS, STATS_CALLBACK, partition
+    counts = get_stats()
+    STATS = STATS_CALLBACK = None
+    partition = _partition
+    return counts
+
+def get_stats():
+    return dict(STATS) if STATS is not None else {}
+
 def A_k(k):
     '''
     Efficiently tests whether an integer 'k' is a pentagonal number
@@ -63,6 +99,48 @@ def A_k(k):
     else:
         return (-1)**((m + 1) // 6)
 
+def staircase_rows(N, rows=None):
+    '''
+    Counts the staircases with exactly k steps that can be built from n
+    bricks, for every n <= N and every k, i.e. the number of partitions
+    of n into exactly k distinct parts q(n, k). Yields (k, row) pairs in
+    increasing k where row[n] == q(n, k) for 0 <= n <= N.
+
+    Applies the recurrence q(n, k) = q(n - k, k) + q(n - k, k - 1):
+    taking one brick off every step of a k-step staircase leaves either a
+    k-step staircase or, when the lowest step held a single brick, a
+    (k - 1)-step one. Each row only depends on itself and the row before
+    it, so the table is rolled over k and memory stays O(N).
+
+    'rows' optionally restricts the yielded rows to the given values of k;
+    computation stops once the largest of them has been produced. Rows
+    with k * (k + 1) / 2 > N are all zeros and are never produced.
+
+    With 1 <= k <= sqrt(2 * N), time complexity is O(N**1.5)
+    '''
+    wanted = None if rows is None else set(rows)
+    last = int(sqrt(2 * N) + 1) if wanted is None else max(wanted, default=0)
+    prev = [1] + [0] * N  # k == 0: only the empty staircase
+    k = 1
+    while k <= last and k * (k + 1) // 2 <= N:
+        cur = [0] * (N + 1)
+        for n in range(k * (k + 1) // 2, N + 1):
+            cur[n] = cur[n - k] + prev[n - k]
+        if wanted is None or k in wanted:
+            yield k, cur
+        prev = cur
+        k += 1
+
+def staircase_table(N, rows=None):
+    '''
+    Collects staircase_rows(N, rows) into a dict of {k: row}. Note that
+    holding every row costs O(N**1.5) memory; iterate staircase_rows
+    directly to keep it O(N).
+
+    sum(table[k][n] for k >= 2) == solution(n)
+    '''
+    return dict(staircase_rows(N, rows))
+
 if __name__ == '__main__':
     s = [None for _ in range(20)]
     for i in range(20):
@@ -1,21 +1,81 @@
-from itertools import count
+from math import gcd
+
+STATS = None  # dict of loop counts while enable_stats() is on
+STATS_CALLBACK = None
 
 def solution(M, F):
-    sol = [int(M), int(F)]
-    k = lambda i: sol[i]
-    c = [0, 1]
+    '''
+    Solution to Bomb, Baby! problem in Google foo.bar
+
+    Every generation replaces one bomb count with the sum of both, so
+    working backwards from (M, F) the larger count is reduced by the
+    smaller one until (1, 1) is reached. Repeated subtraction is replaced
+    by integer division, as in Euclid's algorithm, so inputs of 50+ digits
+    are handled exactly and in O(log(max(M, F))) steps.
+    '''
+    s = str(generations(int(M), int(F)))
+    if STATS_CALLBACK is not None:
+        STATS_CALLBACK(dict(STATS))
+    return s
+
+def solution_many(pairs):
+    '''
+    Batch form of solution() for an iterable of (M, F) string pairs,
+    returning a list of answers in input order. Pairs are consumed one at
+    a time, so 'pairs' may be a generator, and each must hold exactly two
+    values.
+    '''
+    s = [str(generations(int(m), int(f))) for m, f in pairs]
+    if STATS_CALLBACK is not None:
+        STATS_CALLBACK(dict(STATS))
+    return s
+
+def generations(m, f):
+    '''
+    Number of generations needed to reach m Mach and f Facula bombs from
+    (1, 1), or 'impossible'.
+
+    Every reachable pair is coprime (gcd is preserved by the update and
+    gcd(1, 1) == 1), so any pair sharing a factor is rejected up front.
+    For a coprime pair the quotient-stepping loop below always ends with
+    the smaller count at 1, at which point the remaining count - 1
+    generations are single subtractions.
+    '''
+    if m < 1 or f < 1 or gcd(m, f) != 1:
+        return 'impossible'
+    if m < f:
+        m, f = f, m
     i = 0
-    while True:
-        if sol == [1, 1]:
-            return str(i)
-        sol_sort = sorted(c, key=k)
-        diff = sol[sol_sort[1]] - sol[sol_sort[0]]
-        if diff == 0:
-            return 'impossible'
-
-        n = max(diff / sol[sol_sort[0]], 1)
-        sol[sol_sort[1]] -= sol[sol_sort[0]] * n
-        i += n
+    steps = 0
+    while f != 1:
+        q, m = divmod(m, f)
+        i += q
+        m, f = f, m
+        steps += 1
+    if STATS is not None:
+        STATS['pairs'] += 1
+        STATS['iterations'] += steps
+    return i + m - 1
+
+def enable_stats(callback=None):
+    '''
+    pairs: coprime pairs reaching the loop in generations()
+    iterations: steps taken by that loop
+    '''
+    global STATS, STATS_CALLBACK
+    STATS = {'pairs': 0, 'iterations': 0}
+    STATS_CALLBACK = callback
+
+def disable_stats():
+    global STATS, STATS_CALLBACK
+    counts = get_stats()
+    STATS = STATS_CALLBACK = None
+    return counts
+
+def get_stats():
+    return dict(STATS) if STATS is not None else {}
 
 if __name__ == '__main__':
-    print(solution('4', '9'))
\ No newline at end of file
+    print(solution('4', '7'))
+    print(solution('2', '1'))
+    print(solution('2', '4'))
@@ -0,0 +1,140 @@
+'''
+Streams M,F pairs through solution_many() on a pool of worker processes
+
+    python stream.py pairs.txt -o answers.txt
+    cat pairs.txt | python -m bombs_baby.stream
+
+Input holds one 'M,F' pair per line (blank lines are skipped), output
+holds one answer per pair in input order. A line that cannot be solved
+gets an 'error: line N: ...' answer, also reported on stderr, and the run
+carries on. Input is read lazily in chunks and at most 'window' chunks are
+in flight or waiting to be written at any time, so memory use does not
+depend on the size of the input.
+'''
+import sys
+from argparse import ArgumentParser
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+try:
+    from .solution import solution, solution_many
+except ImportError:  # run as a script from within bombs_baby/
+    from solution import solution, solution_many
+
+def read_chunks(lines, size):
+    '''
+    Lazily groups an iterable of lines into lists of up to 'size' lines
+    '''
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def solve_chunk(first, lines):
+    '''
+    Worker side: parses one chunk of 'M,F' lines, numbered from 'first',
+    and returns the number of pairs, the (line number, message) of each
+    pair that failed, and the answers already joined for output.
+
+    The chunk is solved in one solution_many() call; only if that fails is
+    it solved line by line to find and mark the bad lines.
+    '''
+    numbered = [(n, line.split(',')) for n, line in enumerate(lines, first)
+        if not line.isspace()]
+    if not numbered:
+        return 0, [], ''
+    try:
+        answers = solution_many([pair for _, pair in numbered])
+        errors = []
+    except (ValueError, TypeError):
+        answers = []
+        errors = []
+        for n, pair in numbered:
+            try:
+                answers.append(solution(*pair))
+            except (ValueError, TypeError) as e:
+                errors.append((n, str(e)))
+                answers.append('error: line %d: %s' % (n, e))
+    return len(numbered), errors, '\n'.join(answers) + '\n'
+
+def stream(infile, outfile, processes=None, chunk_size=10000, window=None,
+        progress=None):
+    '''
+    Solves every pair in 'infile' and writes the answers to 'outfile'.
+
+    Chunks are handed to the pool as they are read; once 'window' chunks
+    are pending, the oldest is waited on and written before the next one
+    is read. Answers therefore come out in input order and reading never
+    runs more than 'window' chunks ahead of writing.
+
+    If 'progress' is a number of seconds, running throughput is reported
+    on stderr at about that interval. Returns (pairs, errors, seconds).
+    '''
+    processes = processes or cpu_count()
+    window = window or 2 * processes
+    pending = deque()
+    solved = failed = 0
+    start = last_report = perf_counter()
+
+    def write_oldest():
+        nonlocal solved, failed, last_report
+        n, errors, text = pending.popleft().get()
+        outfile.write(text)
+        solved += n
+        failed += len(errors)
+        for line, message in errors:
+            print('line %d: %s' % (line, message), file=sys.stderr)
+        if progress is not None and perf_counter() - last_report >= progress:
+            last_report = perf_counter()
+            report(solved, last_report - start, failed)
+
+    with Pool(processes) as pool:
+        first = 1
+        for chunk in read_chunks(infile, chunk_size):
+            if len(pending) >= window:
+                write_oldest()
+            pending.append(pool.apply_async(solve_chunk, (first, chunk)))
+            first += len(chunk)
+        while pending:
+            write_oldest()
+    outfile.flush()
+    return solved, failed, perf_counter() - start
+
+def report(pairs, seconds, errors=0):
+    rate = pairs / seconds if seconds else float('inf')
+    print('%d pairs in %.2fs (%.0f pairs/s), %d errors'
+        % (pairs, seconds, rate, errors), file=sys.stderr)
+
+def main(argv=None):
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', nargs='?', default='-',
+        help="file of 'M,F' lines, '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-',
+        help="file to write answers to, '-' for stdout (default)")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+        help='worker processes (default: cpu count)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=10000,
+        help='pairs per chunk handed to a worker (default: 10000)')
+    parser.add_argument('-w', '--window', type=int, default=None,
+        help='max chunks in flight (default: 2 * processes)')
+    parser.add_argument('-p', '--progress', type=float, default=None,
+        metavar='SECONDS', help='report throughput every SECONDS')
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.input == '-' else open(args.input)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        pairs, errors, seconds = stream(infile, outfile, args.processes,
+            args.chunk_size, args.window, args.progress)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    report(pairs, seconds, errors)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+Importable front end to the foo.bar solvers
+
+The solvers live as standalone scripts in their puzzle directories, some
+of which (running-with-bunnies) are not valid module names. load() imports
+a solver straight from its file the first time it is asked for, so only
+the solvers actually used are ever imported.
+
+    >>> import foobar
+    >>> foobar.call('bombs_baby', '4', '7')
+    '4'
+
+Every solver module except ll_lambs also keeps opt-in hot-path counts
+through the same three functions, whose docstrings only list the counts
+that module keeps:
+
+    enable_stats(callback=None)  start counting; 'callback', if given, is
+                                 passed a dict of the counts so far after
+                                 every solution() call
+    disable_stats()              stop counting, returning the final counts
+    get_stats()                  the counts so far, {} while disabled
+
+Counting is off by default, which costs one None check per solution()
+call. The loops of ion_flux_relabeling and bombs_baby always keep their
+local step count, which is only published while counting.
+'''
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
+from os.path import abspath, dirname, join
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+SOLVERS = {
+    'best_stairway_ever': join('best_stairway_ever', 'solution.py'),
+    'bombs_baby': join('bombs_baby', 'solution.py'),
+    'ion_flux_relabeling': join('ion_flux_relabeling', 'solution.py'),
+    'll_lambs': join('ll_lambs', 'solution.py'),
+    'running_with_bunnies': join('running-with-bunnies', 'solution.py'),
+    'triples': join('triples', 'solution.py'),
+}
+
+def canonical(name):
+    '''
+    Maps a solver or directory name to its key in SOLVERS, so both
+    'running-with-bunnies' and 'running_with_bunnies' are accepted
+    '''
+    key = name.replace('-', '_')
+    if key not in SOLVERS:
+        raise KeyError('unknown solver %r, expected one of: %s'
+            % (name, ', '.join(sorted(SOLVERS))))
+    return key
+
+def load(name):
+    '''
+    Returns the solver module for 'name', importing it on first use.
+    Modules are registered in sys.modules as foobar.solvers.<name>.
+    '''
+    key = canonical(name)
+    module_name = __name__ + '.solvers.' + key
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = spec_from_file_location(module_name, join(ROOT, SOLVERS[key]))
+        module = module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+    return module
+
+def call(name, *args, func='solution'):
+    '''
+    Calls 'func' (solution() by default) of solver 'name' with 'args'
+    '''
+    return getattr(load(name), func)(*args)
@@ -0,0 +1,100 @@
+'''
+Runs any foo.bar solver from the command line
+
+    python -m foobar bombs_baby '"4"' '"7"'
+    echo '[3, [7, 3, 5, 1]]' | python -m foobar ion_flux_relabeling
+    python -m foobar - < jobs.jsonl
+
+Arguments are JSON values. With no arguments after the solver name, a
+JSON array of arguments is read from stdin. With '-' as the solver name,
+stdin is read as JSON lines of {"solver": ..., "args": [...]} jobs (an
+optional "func" picks a function other than solution) and one line of
+{"result": ...} or {"error": ...} is written per job, so a job runner can
+drive every solver through a single interpreter. Jobs with "stats": true
+also get the solver's hot-path counts for that call back as "stats", or
+null for a solver that keeps none.
+'''
+import json
+import sys
+from argparse import ArgumentParser
+
+from foobar import SOLVERS, call, canonical, load
+
+def call_with_stats(name, args, func='solution'):
+    '''
+    Calls the solver with its stats enabled for just this call and
+    returns (result, stats). Stats are None for solvers without any.
+    '''
+    module = load(name)
+    if not hasattr(module, 'enable_stats'):
+        return call(name, *args, func=func), None
+    module.enable_stats()
+    try:
+        result = call(name, *args, func=func)
+    finally:
+        stats = module.disable_stats()
+    return result, stats
+
+def run_jobs(infile, outfile):
+    for line in infile:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            args = job.get('args', [])
+            if not isinstance(args, list):
+                raise TypeError('args must be a JSON list')
+            func = job.get('func', 'solution')
+            if job.get('stats'):
+                result, stats = call_with_stats(job['solver'], args, func)
+                reply = {'result': result, 'stats': stats}
+            else:
+                reply = {'result': call(job['solver'], *args, func=func)}
+        except Exception as e:
+            reply = {'error': '%s: %s' % (type(e).__name__, e)}
+        outfile.write(json.dumps(reply) + '\n')
+        outfile.flush()
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m foobar',
+        description=__doc__.strip().splitlines()[0])
+    parser.add_argument('solver', nargs='?',
+        help="one of: %s; '-' to read JSON jobs from stdin"
+            % ', '.join(sorted(SOLVERS)))
+    parser.add_argument('args', nargs='*', type=json.loads,
+        help='JSON arguments (default: a JSON array read from stdin)')
+    parser.add_argument('-f', '--func', default='solution',
+        help='solver function to call (default: solution)')
+    parser.add_argument('-s', '--stats', action='store_true',
+        help="print the solver's hot-path counts to stderr")
+    parser.add_argument('-l', '--list', action='store_true',
+        help='list the available solvers and exit')
+    args = parser.parse_intermixed_args(argv)
+
+    if args.list:
+        print('\n'.join(sorted(SOLVERS)))
+        return
+    if args.solver is None:
+        parser.error('a solver name is required')
+    if args.solver == '-':
+        run_jobs(sys.stdin, sys.stdout)
+        return
+    try:
+        canonical(args.solver)
+    except KeyError as e:
+        parser.error(e.args[0])
+    call_args = args.args or json.load(sys.stdin)
+    if not isinstance(call_args, list):
+        parser.error('args must be a JSON list')
+    if args.stats:
+        result, stats = call_with_stats(args.solver, call_args, args.func)
+        if stats is None:
+            print('%s keeps no stats' % args.solver, file=sys.stderr)
+        else:
+            print(json.dumps(stats), file=sys.stderr)
+    else:
+        result = call(args.solver, *call_args, func=args.func)
+    print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+'''
+Benchmarks every solver over scaling input sizes
+
+    python -m foobar.bench -o bench.json
+    python -m foobar.bench --baseline baseline.json --update-baseline
+    python -m foobar.bench --baseline baseline.json
+
+Each case is timed (best of --repeat runs) and then run once more under
+tracemalloc for its peak memory. Once a run of a solver takes longer than
+--budget seconds its peak memory and its larger sizes are recorded as
+skipped, since several solvers are exponential or quadratic in their
+input. best_stairway_ever_fill times solution(i) for every i <= n from a
+cold cache, not a single solution(n).
+
+With --baseline, results are compared against the stored run and the exit
+status is 1 if any case got slower, used more memory than --tolerance
+allows, or was measured in the baseline but skipped now. Runs made with a
+different --repeat, --budget, --tolerance or --seed are not comparable and
+also fail.
+'''
+import json
+import platform
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+
+from foobar import load
+
+def bunnies_input(V, rng):
+    # no negative cycles and an unreachable time limit, so every subset
+    # and permutation of bunnies is examined before giving up
+    times = [[0 if i == j else rng.randint(1, 9) for j in range(V)]
+        for i in range(V)]
+    return times, -1
+
+def triples_input(n, rng):
+    return [rng.randint(1, 200) for _ in range(n)],
+
+def ion_flux_input(h, rng):
+    return h, [rng.randint(1, 2 ** h - 1) for _ in range(10000)]
+
+def bombs_input(n, rng):
+    return [(str(rng.randrange(10 ** 49, 10 ** 50)),
+        str(rng.randrange(10 ** 49, 10 ** 50))) for _ in range(n)],
+
+def lambs_input(n, rng):
+    return [rng.randint(1, 10 ** 9) for _ in range(n)],
+
+def stairs_fill(mod, n):
+    # solution(n) alone recurses n deep on a cold cache, so the case times
+    # the bottom-up fill solution(0..n), which keeps the recursion shallow
+    for i in range(n + 1):
+        mod.solution(i)
+
+def lambs(mod, ns):
+    for n in ns:
+        mod.solution(n)
+
+# name: (solver, sizes, make_input(size, rng) -> args, run(module, *args))
+CASES = {
+    'running_with_bunnies': ('running_with_bunnies', range(5, 13),
+        bunnies_input, lambda mod, *args: mod.solution(*args)),
+    'triples': ('triples', [10 ** e for e in range(3, 7)],
+        triples_input, lambda mod, *args: mod.solution(*args)),
+    'ion_flux_relabeling': ('ion_flux_relabeling', range(5, 31, 5),
+        ion_flux_input, lambda mod, *args: mod.solution(*args)),
+    'best_stairway_ever_fill': ('best_stairway_ever',
+        [10 ** e for e in range(2, 6)], lambda n, rng: (n,), stairs_fill),
+    'bombs_baby': ('bombs_baby', [10 ** e for e in range(2, 6)],
+        bombs_input, lambda mod, *args: mod.solution_many(*args)),
+    'll_lambs': ('ll_lambs', [10 ** e for e in range(2, 6)],
+        lambs_input, lambs),
+}
+
+def reset(mod):
+    # solvers with a result cache would otherwise be timed on cache hits
+    for name in ('CACHE', 'CLOSURE_CACHE'):
+        cache = getattr(mod, name, None)
+        if cache is not None:
+            cache.clear()
+
+def measure(mod, run, args, repeat, budget):
+    '''
+    Returns (best seconds, peak traced bytes) for run(mod, *args). Peak
+    bytes are None when the timed runs already went over 'budget', as
+    tracing would slow the run down several times over.
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        reset(mod)
+        start = perf_counter()
+        run(mod, *args)
+        best = min(best, perf_counter() - start)
+        if best > budget:
+            break
+    if best > budget:
+        return best, None
+    reset(mod)
+    tracemalloc.start()
+    try:
+        run(mod, *args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def bench(names=None, repeat=3, budget=2.0, seed=0, log=sys.stderr):
+    results = {}
+    for name in names or CASES:
+        solver, sizes, make_input, run = CASES[name]
+        mod = load(solver)
+        results[name] = cases = {}
+        over_budget = False
+        for size in sizes:
+            if over_budget:
+                cases[str(size)] = {'skipped': 'over budget'}
+                continue
+            args = make_input(size, Random('%s:%s:%s' % (seed, name, size)))
+            seconds, peak = measure(mod, run, args, repeat, budget)
+            cases[str(size)] = {'seconds': seconds, 'peak_bytes': peak}
+            over_budget = seconds > budget
+            print('%-24s %8s %10.4fs %12s B' % (name, size, seconds,
+                '-' if peak is None else peak), file=log)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'repeat': repeat,
+        'budget': budget,
+        'results': results,
+    }
+
+# run settings that must match for two runs to be compared
+SETTINGS = ('repeat', 'budget', 'tolerance', 'seed')
+
+def regressions(current, baseline, tolerance=0.5, min_seconds=0.05):
+    '''
+    Lists the cases in 'current' that are slower or use more memory than
+    the same case in 'baseline' by more than 'tolerance' (a fraction), or
+    that the baseline measured and 'current' did not. Timing differences
+    under 'min_seconds' are treated as noise. If the two runs were made
+    with different SETTINGS only the mismatch is listed.
+    '''
+    found = ['setting %s: %r != %r baseline' % (
+            key, current.get(key), baseline.get(key))
+        for key in SETTINGS if current.get(key) != baseline.get(key)]
+    if found:
+        return found
+    for name, cases in current['results'].items():
+        base_cases = baseline['results'].get(name, {})
+        for size, case in cases.items():
+            base = base_cases.get(size)
+            if not base or 'seconds' not in base:
+                continue
+            if 'seconds' not in case:
+                found.append('%s[%s]: %s, measured %.4fs in baseline' % (
+                    name, size, case.get('skipped'), base['seconds']))
+                continue
+            limit = base['seconds'] * (1 + tolerance)
+            if case['seconds'] > limit and (
+                    case['seconds'] - base['seconds'] > min_seconds):
+                found.append('%s[%s]: %.4fs > %.4fs baseline' % (
+                    name, size, case['seconds'], base['seconds']))
+            if base['peak_bytes'] is None:
+                continue
+            if case['peak_bytes'] is None:
+                found.append('%s[%s]: memory over budget, %d B in baseline'
+                    % (name, size, base['peak_bytes']))
+                continue
+            if case['peak_bytes'] > base['peak_bytes'] * (1 + tolerance):
+                found.append('%s[%s]: %d B > %d B baseline' % (
+                    name, size, case['peak_bytes'], base['peak_bytes']))
+    return found
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m foobar.bench',
+        description=__doc__.strip().splitlines()[0])
+    parser.add_argument('solvers', nargs='*',
+        help='solvers to benchmark (default: all of %s)' % ', '.join(CASES))
+    parser.add_argument('-o', '--output', help='write results to this file')
+    parser.add_argument('-b', '--baseline',
+        help='compare against (or with --update-baseline, write) this file')
+    parser.add_argument('-u', '--update-baseline', action='store_true',
+        help='store this run as the baseline instead of comparing')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+        help='timed runs per case, the best is kept (default: 3)')
+    parser.add_argument('--budget', type=float, default=2.0,
+        help='seconds after which larger sizes are skipped (default: 2)')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.5,
+        help='allowed fractional slowdown over baseline (default: 0.5)')
+    parser.add_argument('-s', '--seed', type=int, default=0,
+        help='seed for the generated inputs (default: 0)')
+    args = parser.parse_args(argv)
+    unknown = set(args.solvers) - set(CASES)
+    if unknown:
+        parser.error('unknown solvers: %s' % ', '.join(sorted(unknown)))
+
+    current = bench(args.solvers, args.repeat, args.budget, args.seed)
+    current['tolerance'] = args.tolerance
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+    elif args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(current, json.load(f), args.tolerance)
+        for line in found:
+            print('REGRESSION ' + line, file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
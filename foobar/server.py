@@ -0,0 +1,351 @@
+'''
+Serves every foo.bar solver over a local socket
+
+    python -m foobar.server --port 8765
+
+Clients send newline-delimited JSON requests and get one JSON line back
+per request, tagged with the request's "id" since replies to pipelined
+requests may arrive out of order:
+
+    {"id": 1, "solver": "ion_flux_relabeling", "args": [3, [7, 3, 5, 1]]}
+    {"id": 1, "result": [-1, 7, 6, 3], "latency_ms": 2.1}
+
+    {"op": "metrics"}
+    {"result": {"ion_flux_relabeling": {"requests": 1, ...}}}
+
+Concurrent requests for the same solver are coalesced for up to --window
+seconds and solved as one batch: identical requests are answered once,
+and solvers with a solution_many() answer the whole batch in one call.
+CPU-heavy solvers run in a process pool instead of on the event loop.
+At most --max-pending requests are in flight, and at most --max-in-flight
+from any one connection; past that the server stops reading until replies
+have gone out. A client that leaves a reply unread for --write-timeout
+seconds is disconnected, so it cannot hold on to its share.
+
+With --shared-cache the pool workers share running_with_bunnies' caches
+through a manager process, so a matrix solved by one worker is not solved
+again by another.
+'''
+import asyncio
+import json
+import signal
+import sys
+from argparse import ArgumentParser
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from time import perf_counter
+
+from foobar import SOLVERS, call, canonical, load
+
+# solvers answered in a single call per batch, given the batch's arg lists
+BATCHED = {
+    'bombs_baby': lambda mod, batch: mod.solution_many(batch),
+    'ion_flux_relabeling': lambda mod, batch: mod.solution_many(batch),
+    'll_lambs': lambda mod, batch: mod.solution_many([n for n, in batch]),
+}
+
+# solvers run one request per worker process so batches solve in parallel
+PROCESS_POOL = {'running_with_bunnies', 'triples'}
+
+def share_cache(store):
+    '''
+    Pool initializer pointing the worker's running_with_bunnies caches at
+    the shared 'store'
+    '''
+    load('running_with_bunnies').configure_cache(store=store)
+
+class Metrics(object):
+    '''
+    Per-solver request, error and batch counts, along with the latencies
+    of the most recent 'window' requests
+    '''
+    def __init__(self, window=1000):
+        self._counts = defaultdict(Counter)
+        self._latencies = defaultdict(partial(deque, maxlen=window))
+
+    def batch(self, solver, unique):
+        counts = self._counts[solver]
+        counts['batches'] += 1
+        counts['solved'] += unique
+
+    def request(self, solver, seconds, error=False):
+        counts = self._counts[solver]
+        counts['requests'] += 1
+        if error:
+            counts['errors'] += 1
+        self._latencies[solver].append(seconds)
+
+    def snapshot(self):
+        out = {}
+        for solver, counts in self._counts.items():
+            latencies = sorted(self._latencies[solver])
+            summary = dict(counts)
+            if latencies:
+                pick = lambda p: latencies[int(p * (len(latencies) - 1))]
+                summary['latency_ms'] = {
+                    'mean': 1000 * sum(latencies) / len(latencies),
+                    'p50': 1000 * pick(0.5),
+                    'p95': 1000 * pick(0.95),
+                    'p99': 1000 * pick(0.99),
+                    'max': 1000 * latencies[-1],
+                }
+            out[solver] = summary
+        return out
+
+class Batcher(object):
+    '''
+    Collects the requests for one solver and solves them in batches of up
+    to 'max_batch', waiting 'window' seconds after the first request of a
+    batch for others to join it
+    '''
+    def __init__(self, solver, pool, metrics, window, max_batch):
+        self.solver = solver
+        self.pool = pool
+        self.metrics = metrics
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.dispatching = set()
+        self.task = asyncio.ensure_future(self.run())
+
+    async def submit(self, args):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((args, future))
+        return await future
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            # solving is handed off so the next batch can start collecting
+            # while process pool work is still running
+            task = asyncio.ensure_future(self.dispatch(batch))
+            self.dispatching.add(task)
+            task.add_done_callback(self.dispatching.discard)
+
+    async def dispatch(self, batch):
+        '''
+        Solves 'batch' and resolves its futures. Anything going wrong on the
+        way is set on every future still unresolved, so no request is left
+        waiting on a batch that failed.
+        '''
+        try:
+            unique = {}
+            for args, _ in batch:
+                unique.setdefault(json.dumps(args), args)
+            self.metrics.batch(self.solver, len(unique))
+            results = dict(zip(unique,
+                await self.solve(list(unique.values()))))
+            for args, future in batch:
+                result = results[json.dumps(args)]
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception)
+                        else RuntimeError('batch interrupted'))
+            if not isinstance(e, Exception):
+                raise
+
+    async def solve(self, batch):
+        '''
+        Returns one result, or the exception raised, per arg list in 'batch'
+        '''
+        if self.solver in PROCESS_POOL:
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*(
+                loop.run_in_executor(self.pool, partial(call, self.solver, *args))
+                for args in batch), return_exceptions=True)
+        mod = load(self.solver)
+        if self.solver in BATCHED:
+            try:
+                results = BATCHED[self.solver](mod, batch)
+                if len(results) == len(batch):
+                    return results
+            except Exception:
+                pass
+            # fall through so only the bad requests fail
+        results = []
+        for args in batch:
+            try:
+                results.append(mod.solution(*args))
+            except Exception as e:
+                results.append(e)
+        return results
+
+class SolverServer(object):
+    def __init__(self, processes=None, window=0.002, max_batch=256,
+            max_pending=1024, max_in_flight=64, write_timeout=30.0,
+            shared_cache=False):
+        # workers are started on demand, after connections are accepted; a
+        # forked worker would inherit the client sockets and keep them open
+        context = get_context('spawn')
+        self.manager = None
+        initializer, initargs = None, ()
+        if shared_cache:
+            self.manager = context.Manager()
+            initializer, initargs = share_cache, (self.manager.dict(),)
+        self.pool = ProcessPoolExecutor(processes, context, initializer,
+            initargs)
+        self.metrics = Metrics()
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = asyncio.Semaphore(max_pending)
+        self.max_in_flight = max_in_flight
+        self.write_timeout = write_timeout
+        self.batchers = {}
+
+    def batcher(self, solver):
+        if solver not in self.batchers:
+            self.batchers[solver] = Batcher(solver, self.pool, self.metrics,
+                self.window, self.max_batch)
+        return self.batchers[solver]
+
+    async def handle(self, reader, writer):
+        tasks = set()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        try:
+            while True:
+                # waiting here while saturated leaves unread requests in
+                # the socket buffers, which pushes back on the clients
+                await in_flight.acquire()
+                await self.pending.acquire()
+                try:
+                    line = await reader.readline()
+                except Exception:
+                    self.pending.release()
+                    in_flight.release()
+                    raise
+                if not line:
+                    self.pending.release()
+                    in_flight.release()
+                    break
+                task = asyncio.ensure_future(
+                    self.respond(line, writer, in_flight))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except asyncio.CancelledError:
+            # the server is closing; before Python 3.12 a handler ending
+            # cancelled is logged as an unhandled exception
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer, in_flight):
+        try:
+            reply = await self.answer(line)
+            writer.write((json.dumps(reply) + '\n').encode())
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except asyncio.TimeoutError:
+            writer.transport.abort()
+        except ConnectionError:
+            pass
+        finally:
+            self.pending.release()
+            in_flight.release()
+
+    async def answer(self, line):
+        start = perf_counter()
+        solver = None
+        reply = {}
+        try:
+            request = json.loads(line)
+            reply['id'] = request.get('id')
+            if request.get('op') == 'metrics':
+                reply['result'] = self.metrics.snapshot()
+                return reply
+            solver = canonical(request['solver'])
+            args = request.get('args', [])
+            if not isinstance(args, list):
+                raise TypeError('args must be a JSON list')
+            reply['result'] = await self.batcher(solver).submit(args)
+        except Exception as e:
+            reply['error'] = '%s: %s' % (type(e).__name__, e)
+        seconds = perf_counter() - start
+        if solver is not None:
+            self.metrics.request(solver, seconds, 'error' in reply)
+        reply['latency_ms'] = 1000 * seconds
+        return reply
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.task.cancel()
+            for task in batcher.dispatching:
+                task.cancel()
+        # shutdown() leaves solves already running alone, and the exiting
+        # interpreter would wait for them, so their workers are terminated
+        workers = list((self.pool._processes or {}).values())
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for process in workers:
+            process.terminate()
+        if self.manager is not None:
+            self.manager.shutdown()
+
+def main(argv=None):
+    parser = ArgumentParser(prog='python -m foobar.server',
+        description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1',
+        help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('-p', '--port', type=int, default=8765,
+        help='port to listen on (default: 8765)')
+    parser.add_argument('-j', '--processes', type=int, default=None,
+        help='worker processes for %s (default: cpu count)'
+            % ', '.join(sorted(PROCESS_POOL)))
+    parser.add_argument('-w', '--window', type=float, default=0.002,
+        help='seconds to wait for a batch to fill (default: 0.002)')
+    parser.add_argument('-b', '--max-batch', type=int, default=256,
+        help='most requests solved in one batch (default: 256)')
+    parser.add_argument('-m', '--max-pending', type=int, default=1024,
+        help='most requests in flight before reads pause (default: 1024)')
+    parser.add_argument('-i', '--max-in-flight', type=int, default=64,
+        help='most requests in flight per connection (default: 64)')
+    parser.add_argument('-t', '--write-timeout', type=float, default=30.0,
+        help='seconds a reply may wait on a client before it is '
+            'disconnected (default: 30)')
+    parser.add_argument('-c', '--shared-cache', action='store_true',
+        help='share running_with_bunnies results between worker processes')
+    args = parser.parse_args(argv)
+
+    async def run():
+        server = SolverServer(args.processes, args.window, args.max_batch,
+            args.max_pending, args.max_in_flight, args.write_timeout,
+            args.shared_cache)
+        try:
+            # stop as on Ctrl-C, so the final metrics still get printed
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM,
+                asyncio.current_task().cancel)
+        except NotImplementedError:
+            pass  # no signal handlers on Windows event loops
+        print('serving %s on %s:%d' % (', '.join(sorted(SOLVERS)),
+            args.host, args.port), file=sys.stderr)
+        try:
+            await server.serve(args.host, args.port)
+        finally:
+            print(json.dumps(server.metrics.snapshot()), file=sys.stderr)
+            server.close()
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == '__main__':
+    main()
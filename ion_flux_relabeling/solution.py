@@ -1,17 +1,24 @@
+from collections import defaultdict
+from itertools import count
+
 LEFT = False
 RIGHT = True
 
+STATS = None  # dict of loop counts while enable_stats() is on
+STATS_CALLBACK = None
+
 def solution(h, q):
     '''
     h: height of tree
     q: list of integers to consider'''
     q_rev = [x for x in reversed(q)]
     s = []
+    iterations = 0
     while q_rev:
         n = q_rev.pop()
         node = n
         height = h
-        while True:
+        for steps in count(1):
             rank = int.bit_length(node)
 
             if rank >= height:
@@ -28,14 +35,58 @@ def solution(h, q):
             if hand == RIGHT:
                 height -= 1
                 node -= 2 ** height - 1
+        iterations += steps
 
         label = n + offset
         if label >= 2 ** h:
             s.append(-1)
         else:
             s.append(label)
+    if STATS is not None:
+        STATS['queries'] += len(q)
+        STATS['iterations'] += iterations
+        if STATS_CALLBACK is not None:
+            STATS_CALLBACK(dict(STATS))
+    return s
+
+def solution_many(queries):
+    '''
+    Batch form of solution() for a list of (h, q) pairs. The q lists of
+    all queries sharing a tree height are answered by a single solution()
+    call and split back apart, in input order
+    '''
+    queries = list(queries)
+    by_height = defaultdict(list)
+    for i, (h, _) in enumerate(queries):
+        by_height[h].append(i)
+    s = [None] * len(queries)
+    for h, members in by_height.items():
+        labels = solution(h, [n for i in members for n in queries[i][1]])
+        start = 0
+        for i in members:
+            end = start + len(queries[i][1])
+            s[i] = labels[start:end]
+            start = end
     return s
 
+def enable_stats(callback=None):
+    '''
+    queries: labels looked up by solution()
+    iterations: tree levels walked by its inner loop
+    '''
+    global STATS, STATS_CALLBACK
+    STATS = {'queries': 0, 'iterations': 0}
+    STATS_CALLBACK = callback
+
+def disable_stats():
+    global STATS, STATS_CALLBACK
+    counts = get_stats()
+    STATS = STATS_CALLBACK = None
+    return counts
+
+def get_stats():
+    return dict(STATS) if STATS is not None else {}
+
 if __name__ == '__main__':
     print(solution(3, [7, 3, 5, 1]))
     print(solution(5, [19, 14, 28]))
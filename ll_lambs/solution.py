@@ -11,6 +11,7 @@ Growth Series Compared
          0                                                                     
 
 '''
+from bisect import bisect_right
 
 def fib(n):
     '''
@@ -56,4 +57,25 @@ def exp_2(n):
     return bin(n).count('1')
 
 def solution(n):
-    return fib(n) - exp_2(n)
\ No newline at end of file
+    return fib(n) - exp_2(n)
+
+def solution_many(ns):
+    '''
+    Vectorized solution() for a list of funds 'ns'. The running sums of
+    the fibonacci series that fib() walks for each n are built once, up
+    to max(ns), and each n is then placed among them by bisection
+    '''
+    ns = list(ns)
+    top = max(ns, default=0)
+    sums = []  # sums[j] is f_s in fib() at i == j + 2
+    f = [1, 1]
+    f_s = 2
+    i = 2
+    while not sums or sums[-1] <= top:
+        f_n = sum(f)
+        f_s += f_n
+        sums.append(f_s)
+        f[i % 2] = f_n
+        i += 1
+    return [(n if n < 3 else bisect_right(sums, n) + 2) - exp_2(n)
+        for n in ns]
\ No newline at end of file
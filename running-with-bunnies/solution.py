@@ -1,8 +1,15 @@
-from collections import namedtuple, Counter, deque
+from collections import namedtuple, Counter, OrderedDict, deque
+from hashlib import sha256
 from itertools import combinations, permutations
+from json import dumps
+from math import factorial
+from sys import getsizeof
 
 DirectedEdge = namedtuple('DirectedEdge', ['from_v', 'to_w', 'weight'])
 
+STATS = None  # Counter of hot-path events while enable_stats() is on
+STATS_CALLBACK = None
+
 def solution(times, time_limit):
     '''
     Discovers the optimal set of bunnies to rescue from a given corridor
@@ -45,26 +52,66 @@ def solution(times, time_limit):
     in the metric closure is equivalent to the asymmetric traveling salesman
     problem, the brute force approach here for all combinations of bunnies
     is O(n!) for 'n' nodes.
+
+    Answers are kept in CACHE keyed by a hash of 'times' and 'time_limit'.
+    The metric closures, which do not depend on 'time_limit', are kept in
+    CLOSURE_CACHE under the hash of 'times' alone, so asking again about
+    the same matrix with another limit skips every Bellman-Ford run
+    already made. configure_cache() sets their limits and the shared
+    store, if any, that worker processes look each other's entries up in.
+    '''
+    key = matrix_key(times)
+    rescued = CACHE.get((key, time_limit))
+    if rescued is None:
+        closures = CLOSURE_CACHE.get(key)
+        if closures is None:
+            closures = {}
+        known = len(closures)
+        rescued = tuple(rescue(times, time_limit, closures,
+            CLOSURE_CACHE.max_bytes))
+        if len(closures) != known:
+            CLOSURE_CACHE.put(key, closures)
+        CACHE.put((key, time_limit), rescued)
+    if STATS_CALLBACK is not None:
+        STATS_CALLBACK(dict(STATS))
+    return list(rescued)
+
+def matrix_key(times):
+    '''
+    Canonical content hash of a 'times' matrix
+    '''
+    return sha256(dumps(times, separators=(',', ':')).encode()).hexdigest()
+
+def rescue(times, time_limit, closures, max_bytes=None):
+    '''
+    The search described in solution(). 'closures' maps each corridor
+    already examined to its metric closure, or to None when it holds a
+    negative cycle, and is filled in with the corridors newly examined
+    for as long as its estimated size stays within 'max_bytes'.
     '''
     V_i = len(times)  # number of spaces in initial corridor
+    held = deep_sizeof(closures) - getsizeof(closures)
     bunnies = [i + 1 for i in range(V_i - 2)]
     for f in reversed(bunnies):
         for rescued in combinations(bunnies, f):
             rescued = list(rescued)
+            if STATS is not None:
+                STATS['subsets'] += 1
             corridor = [0]
             corridor.extend(rescued)
             corridor.append(V_i - 1)
-            G = EdgeWeightedDigraph(V_i, times, corridor)
-            spt = [object for _ in range(V_i)]
-            G_mc = [[int() for _ in range(V_i)] for _ in range(V_i)]
-            for i in corridor:
-                spt[i] = BellmanFordSP(G, i)
-                if spt[i].has_negative_cycle():
-                    return [b - 1 for b in bunnies]
-                
-                for v in corridor:
-                    if v != i:
-                        G_mc[i][v] = path_weight(spt[i].path_to(v))
+            corridor = tuple(corridor)
+            if corridor in closures:
+                G_mc = closures[corridor]
+            else:
+                G_mc = metric_closure(times, corridor)
+                size = deep_sizeof(corridor) + deep_sizeof(G_mc)
+                if max_bytes is None or (
+                        getsizeof(closures) + held + size <= max_bytes):
+                    closures[corridor] = G_mc
+                    held += size
+            if G_mc is None:
+                return [b - 1 for b in bunnies]
 
             # Brute force examination of paths in G_mc
             for p in permutations(rescued):
@@ -77,9 +124,181 @@ def solution(times, time_limit):
                     weight += G_mc[v][w]
                     v = w
                 if weight <= time_limit:
+                    if STATS is not None:
+                        STATS['permutations'] += permutation_rank(p[:-1]) + 1
                     return [b - 1 for b in rescued]
+            if STATS is not None:
+                STATS['permutations'] += factorial(len(rescued))
     return []
 
+def metric_closure(times, corridor):
+    '''
+    Weights of the minimum paths between the vertices of 'corridor' using
+    only arcs within it, or None if those arcs contain a negative cycle
+    '''
+    V_i = len(times)
+    G = EdgeWeightedDigraph(V_i, times, corridor)
+    spt = [object for _ in range(V_i)]
+    G_mc = [[int() for _ in range(V_i)] for _ in range(V_i)]
+    for i in corridor:
+        spt[i] = BellmanFordSP(G, i)
+        if spt[i].has_negative_cycle():
+            return None
+
+        for v in corridor:
+            if v != i:
+                G_mc[i][v] = path_weight(spt[i].path_to(v))
+    return G_mc
+
+def enable_stats(callback=None):
+    '''
+    subsets: combinations of bunnies considered
+    permutations: orderings of those bunnies whose weight was summed
+    bellman_ford: BellmanFordSP instances built
+    relaxations: edges relaxed by BellmanFordSP
+    negative_cycle_checks: BellmanFordSP.find_negative_cycle() calls
+    '''
+    global STATS, STATS_CALLBACK
+    STATS = Counter()
+    STATS_CALLBACK = callback
+
+def disable_stats():
+    global STATS, STATS_CALLBACK
+    counts = get_stats()
+    STATS = STATS_CALLBACK = None
+    return counts
+
+def get_stats():
+    return dict(STATS) if STATS is not None else {}
+
+def permutation_rank(p):
+    '''
+    Position of 'p' in the lexicographic order that permutations() yields
+    for sorted(p), so the permutations examined before a solution is found
+    can be counted without counting inside the loop
+    '''
+    rank = 0
+    for i, x in enumerate(p):
+        smaller = sum(1 for y in p[i + 1:] if y < x)
+        rank += smaller * factorial(len(p) - i - 1)
+    return rank
+
+class ResultCache(object):
+    '''
+    Bounded LRU cache. Entries are evicted least recently used first once
+    there are more than 'max_entries' of them or their estimated size
+    exceeds 'max_bytes'; either limit may be None for no limit.
+
+    'store' is an optional shared mapping, e.g. a multiprocessing Manager
+    dict or a shelve, that entries are written through to and looked up in
+    on a local miss, so sibling worker processes share each other's work.
+    Keys in 'store' are strings. Entries larger than 'max_bytes' are not
+    written to it, but nothing is ever evicted from it here, so the store
+    is unbounded unless its owner limits or clears it.
+    '''
+    def __init__(self, max_entries=1024, max_bytes=64 * 2**20, store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._stats = Counter()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        '''
+        Returns the entry for 'key', or None if it is not cached
+        '''
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return self._entries[key]
+        if self.store is not None:
+            value = self.store.get(repr(key))
+            if value is not None:
+                self._stats['shared_hits'] += 1
+                self._insert(key, value)
+                return value
+        self._stats['misses'] += 1
+        return None
+
+    def put(self, key, value):
+        size = self._insert(key, value)
+        if self.store is not None and (
+                self.max_bytes is None or size <= self.max_bytes):
+            self.store[repr(key)] = value
+
+    def clear(self):
+        '''
+        Empties the local cache, the shared store is left alone
+        '''
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def stats(self):
+        '''
+        Counts of hits, shared_hits, misses and evictions so far, along
+        with the current number of entries and their estimated bytes
+        '''
+        counts = dict.fromkeys(['hits', 'shared_hits', 'misses', 'evictions'], 0)
+        counts.update(self._stats)
+        counts['entries'] = len(self._entries)
+        counts['bytes'] = self._bytes
+        return counts
+
+    def _insert(self, key, value):
+        if key in self._entries:
+            self._bytes -= self._sizes.pop(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._sizes[key] = size = deep_sizeof(key) + deep_sizeof(value)
+        self._bytes += size
+        while self._entries and (
+                (self.max_entries is not None
+                    and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None
+                    and self._bytes > self.max_bytes)):
+            old, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old)
+            self._stats['evictions'] += 1
+        return size
+
+def deep_sizeof(obj):
+    '''
+    Estimated bytes held by 'obj' and the containers nested within it
+    '''
+    size = getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_sizeof(k) + deep_sizeof(v)
+    elif isinstance(obj, (list, tuple)):
+        for x in obj:
+            size += deep_sizeof(x)
+    return size
+
+CACHE = ResultCache()
+CLOSURE_CACHE = ResultCache(max_entries=256)
+
+def configure_cache(max_entries=1024, max_closures=256, max_bytes=64 * 2**20,
+        store=None):
+    '''
+    Replaces CACHE and CLOSURE_CACHE with empty caches holding at most
+    'max_entries' answers and 'max_closures' matrices of metric closures,
+    each limited to 'max_bytes', and sharing 'store' if one is given.
+    Meant to be called once per process, e.g. as a pool initializer.
+    '''
+    global CACHE, CLOSURE_CACHE
+    CACHE = ResultCache(max_entries, max_bytes, store)
+    CLOSURE_CACHE = ResultCache(max_closures, max_bytes, store)
+
 def path_weight(path):
     weight = 0
     for e in path:
@@ -180,6 +399,12 @@ class BellmanFordSP(object):
             self.on_queue[v] = False
             self.relax(G, v)
 
+        if STATS is not None:
+            # relax() checks for a negative cycle before every G.V'th edge
+            STATS['bellman_ford'] += 1
+            STATS['relaxations'] += self._cost
+            STATS['negative_cycle_checks'] += -(-self._cost // G.V)
+
     @property
     def edge_to(self):
         return self._edge_to
@@ -1,5 +1,8 @@
 from random import randint
 
+STATS = None  # dict of hot-path counts while enable_stats() is on
+STATS_CALLBACK = None
+
 def solution(l):
     '''
     Finds the number of "lucky triples" in list l
@@ -20,9 +23,30 @@ def solution(l):
     count = 0
     for v in range(len(codes)):
         count += g.triple_count(v)
+    if STATS is not None:
+        STATS['edges'] += g.E
+        if STATS_CALLBACK is not None:
+            STATS_CALLBACK(dict(STATS))
     
     return count
 
+def enable_stats(callback=None):
+    '''
+    edges: edges created in the Digraph, taken from the finished graph
+    '''
+    global STATS, STATS_CALLBACK
+    STATS = {'edges': 0}
+    STATS_CALLBACK = callback
+
+def disable_stats():
+    global STATS, STATS_CALLBACK
+    counts = get_stats()
+    STATS = STATS_CALLBACK = None
+    return counts
+
+def get_stats():
+    return dict(STATS) if STATS is not None else {}
+
 class Digraph(object):
     def __init__(self, V):
         self._V = V  # number of vertices
@@ -34,6 +58,10 @@ class Digraph(object):
     @property
     def adj(self):
         return self._adj
+
+    @property
+    def E(self):
+        return sum(map(len, self.adj))
     
     def triple_count(self, s):
         # counts all triples that start from a given vertex 's'